@@ -3,19 +3,34 @@ import os
 import time
 import yaml
 import json
+import hashlib
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from json import JSONDecodeError
+from typing import Optional
+from urllib.request import urlopen
 from behave.model import Feature, Scenario, Step
-from rdflib import ConjunctiveGraph
+from rdflib import ConjunctiveGraph, Dataset
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
 from behave.runner import Context
 from rdf_utils.uri import URL_SECORO_M
 from rdf_utils.resolver import install_resolver
 from rdf_utils.naming import get_valid_var_name
 from bdd_isaacsim_exec.behave import before_all_isaac, before_scenario_isaac, after_scenario_isaac
 
+try:
+    # use the libyaml-backed loader when PyYAML is built with it
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
 
 LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(name=LOG_DIR, exist_ok=True)
 
+# parsed models are cached as N-Quads, keyed by URL & the ETag/Last-Modified header
+MODEL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bdd_isaacsim_exec")
+
 
 MODELS = {
     f"{URL_SECORO_M}/acceptance-criteria/bdd/agents/isaac-sim.agn.json": "json-ld",
@@ -51,21 +66,15 @@ LIVESTREAM_DEFAULT = {
 }
 
 DEFAULT_ISAAC_PHYSICS_DT_SEC = 1.0 / 60.0
+MAX_MODEL_FETCH_WORKERS = 16
+MODEL_FETCH_TIMEOUT_SEC = 30.0
 
 
 def before_all(context: Context):
     install_resolver()
     config_file = context.config.userdata.get("config_file", "config.yaml")
     read_config_file(context, config_file)
-    g = ConjunctiveGraph()
-    for url, fmt in MODELS.items():
-        try:
-            g.parse(url, format=fmt)
-        except JSONDecodeError as e:
-            print(f"error parsing '{url}' into graph (format='{fmt}'):\n{e}")
-            sys.exit(1)
-
-    context.model_graph = g
+    context.model_graph = load_model_graph(MODELS)
 
     apply_defaults(context, BASE_DEFAULT)
 
@@ -77,6 +86,92 @@ def before_all(context: Context):
     before_all_isaac(context=context, time_step_sec=DEFAULT_ISAAC_PHYSICS_DT_SEC)
 
 
+def _get_model_cache_path(url: str, validator: str) -> str:
+    cache_key = hashlib.sha256(f"{url}\n{validator}".encode("utf-8")).hexdigest()
+    return os.path.join(MODEL_CACHE_DIR, f"{cache_key}.nq")
+
+
+def _fetch_model(url: str) -> tuple[Optional[str], Optional[bytes]]:
+    """Return the model's cache path (None if not cacheable) and content (None on cache hit)."""
+    # urlopen goes through the opener registered by install_resolver()
+    with urlopen(url, timeout=MODEL_FETCH_TIMEOUT_SEC) as response:
+        validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        if validator is None:
+            return None, response.read()
+
+        cache_path = _get_model_cache_path(url=url, validator=validator)
+        if os.path.exists(cache_path) and os.path.exists(f"{cache_path}.ns.json"):
+            return cache_path, None
+
+        return cache_path, response.read()
+
+
+def _load_cached_model(cache_path: str) -> tuple[Dataset, dict[str, str]]:
+    model_ds = Dataset()
+    model_ds.parse(cache_path, format="nquads")
+    # N-Quads has no prefixes, bindings from the original model are stored separately
+    with open(f"{cache_path}.ns.json", "r") as file:
+        namespaces = json.load(file)
+    return model_ds, namespaces
+
+
+def _write_model_cache(model_ds: Dataset, cache_path: str, namespaces: dict[str, str]):
+    # write to temporary files first, so that an interrupted run never leaves a partial cache
+    ns_path = f"{cache_path}.ns.json"
+    with open(f"{ns_path}.tmp", "w") as file:
+        file.write(json.dumps(namespaces))
+    os.replace(f"{ns_path}.tmp", ns_path)
+
+    model_ds.serialize(destination=f"{cache_path}.tmp", format="nquads", encoding="utf-8")
+    os.replace(f"{cache_path}.tmp", cache_path)
+
+
+def _merge_model(g: ConjunctiveGraph, model_ds: Dataset, namespaces: dict[str, str]):
+    # keep named graphs of the model, its default graph goes into the default graph of `g`
+    for model_graph in model_ds.graphs():
+        if model_graph.identifier == DATASET_DEFAULT_GRAPH_ID:
+            target_graph = g.default_context
+        else:
+            target_graph = g.get_context(model_graph.identifier)
+        target_graph += model_graph
+    for prefix, namespace in namespaces.items():
+        g.bind(prefix, namespace)
+
+
+def load_model_graph(models: dict[str, str]) -> ConjunctiveGraph:
+    """Download all models concurrently, then parse them into a single graph.
+
+    Parsing stays on the calling thread and follows the order of `models`, since rdflib stores
+    are not thread-safe and namespace bindings depend on parsing order. Each model is parsed
+    into its own dataset before being merged, so that models that were parsed in a previous
+    run and have not changed since can be loaded from MODEL_CACHE_DIR instead.
+    """
+    os.makedirs(name=MODEL_CACHE_DIR, exist_ok=True)
+    g = ConjunctiveGraph()
+    with ThreadPoolExecutor(max_workers=min(MAX_MODEL_FETCH_WORKERS, len(models))) as executor:
+        futures = {url: executor.submit(_fetch_model, url) for url in models}
+        for url, fmt in models.items():
+            cache_path, data = futures[url].result()
+            if data is None:
+                assert cache_path is not None, f"no content or cache for model '{url}'"
+                model_ds, namespaces = _load_cached_model(cache_path=cache_path)
+                _merge_model(g=g, model_ds=model_ds, namespaces=namespaces)
+                continue
+
+            model_ds = Dataset()
+            try:
+                model_ds.parse(data=data, format=fmt, publicID=url)
+            except JSONDecodeError as e:
+                print(f"error parsing '{url}' into graph (format='{fmt}'):\n{e}")
+                sys.exit(1)
+
+            namespaces = {prefix: str(ns) for prefix, ns in model_ds.namespaces()}
+            _merge_model(g=g, model_ds=model_ds, namespaces=namespaces)
+            if cache_path is not None:
+                _write_model_cache(model_ds=model_ds, cache_path=cache_path, namespaces=namespaces)
+    return g
+
+
 def apply_defaults(context, defaults: dict):
     for key, default_value in defaults.items():
         if not hasattr(context, key):
@@ -89,7 +184,7 @@ def read_config_file(context: Context, filename: str):
 
     with open(config_path, "r") as file:
         try:
-            config = yaml.safe_load(file)
+            config = yaml.load(file, Loader=YamlSafeLoader)
         except yaml.YAMLError as e:
             raise ValueError(f"Error parsing config file '{config_path}': {e}")
         for key, value in config.items():
@@ -105,30 +200,34 @@ def after_feature(context: Context, feature: Feature):
         LOG_DIR,
         f"log_data-{get_valid_var_name(feature.name)}-{time.strftime('%Y%m%d-%H%M%S')}.json",
     )
-    with open(log_data_file, "w") as file:
-        file.write(json.dumps(context.log_data))
+    # URIRef keys & numpy values may end up in step debug info
+    with open(log_data_file, "wb", buffering=1 << 20) as file:
+        file.write(
+            orjson.dumps(
+                context.log_data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        )
 
 
 def before_scenario(context: Context, scenario: Scenario):
     context.log_data[scenario.name] = {"clauses": []}
-    context.scenario_start_time = time.process_time()
+    context.scenario_start_ns = time.perf_counter_ns()
     before_scenario_isaac(context, scenario)
 
 
 def after_scenario(context: Context, scenario: Scenario):
-    scr_exec_time = time.process_time() - context.scenario_start_time
+    scr_exec_time = (time.perf_counter_ns() - context.scenario_start_ns) * 1e-9
     context.log_data[scenario.name]["exec_time"] = scr_exec_time
     after_scenario_isaac(context)
 
 
 def before_step(context: Context, step: Step):
     context.step_debug_info = {"name": step.name, "keyword": step.keyword, "fail_info": {}}
-    step_start = time.process_time()
-    context.step_start = step_start
+    context.step_start_ns = time.perf_counter_ns()
 
 
 def after_step(context: Context, step: Step):
-    step_exec_time = time.process_time() - context.step_start
+    step_exec_time = (time.perf_counter_ns() - context.step_start_ns) * 1e-9
     context.step_debug_info["exec_time"] = step_exec_time
     context.step_debug_info["status"] = step.status.name
     context.log_data[context.scenario.name]["clauses"].append(context.step_debug_info)
@@ -145,6 +145,9 @@ def before_scenario_isaac(context: Context, scenario: Scenario):
 
     # TODO(minhnh): handles different task? Isaacsim expects a single task
     from bdd_isaacsim_exec.tasks import load_isaacsim_task
+    from bdd_isaacsim_exec.utils import get_cached_stage_units
+
+    get_cached_stage_units.cache_clear()
 
     task = load_isaacsim_task(world=context.world, graph=model_graph, scr_var=scenario_var_model)
     print(f"**** Loaded Isaac Sim Task {task.name}")
@@ -10,7 +10,7 @@ from bdd_dsl.behave import parse_str_param
 from bdd_dsl.models.agent import AgentModel
 from bdd_dsl.models.environment import ObjectModel, WorkspaceModel
 from bdd_dsl.models.user_story import ScenarioVariantModel, SceneModel
-from bdd_isaacsim_exec.utils import create_rigid_prim_in_scene
+from bdd_isaacsim_exec.utils import create_rigid_prim_in_scene, sample_obj_positions
 
 from omni.isaac.core import World
 from omni.isaac.core.tasks import BaseTask
@@ -131,13 +131,15 @@ class PickPlace(BaseTask):
 
         scene.add_default_ground_plane()
 
-        for obj_id, obj_model in self._obj_models.items():
+        obj_positions = sample_obj_positions(num=len(self._obj_models))
+        for (obj_id, obj_model), obj_position in zip(self._obj_models.items(), obj_positions):
             print(f"*** loading model for object {obj_id}")
             obj_prim = create_rigid_prim_in_scene(
                 scene=scene,
                 ns_manager=self._ns_manager,
                 model=obj_model,
                 prim_prefix="/World/Objects/",
+                position=obj_position,
             )
             self._obj_prims[obj_id] = obj_prim
 
@@ -1,6 +1,9 @@
 # SPDX-License-Identifier:  GPL-3.0-or-later
+from collections import defaultdict
+from functools import lru_cache
+from itertools import count
 from os.path import exists as os_exists
-from typing import Union
+from typing import Iterator, Optional, Union
 import numpy as np
 from rdflib.namespace import NamespaceManager
 from rdf_utils.naming import get_valid_var_name
@@ -26,23 +29,22 @@ from omni.isaac.core.utils.prims import is_prim_path_valid
 
 _CACHED_ASSET_ROOT = None
 _CACHED_ID_STRS = set()
+_ID_COUNTERS: dict[str, Iterator[int]] = defaultdict(count)
 OBJ_POSITION_LOWER_BOUNDS = [0.25, -0.4, 0.15]
 OBJ_POSITION_UPPER_BOUNDS = [0.6, 0.4, 0.2]
+_OBJ_POSITION_LOWER_BOUNDS_ARR = np.asarray(OBJ_POSITION_LOWER_BOUNDS, dtype=np.float64)
+_OBJ_POSITION_UPPER_BOUNDS_ARR = np.asarray(OBJ_POSITION_UPPER_BOUNDS, dtype=np.float64)
+_RNG = np.random.default_rng()
 
 
-def _get_unique_id_str(id_str: str, max_iteration: int = 100) -> str:
-    iter_count = 0
-    while True:
-        if iter_count > max_iteration:
-            raise RuntimeError(f"unable to find unique string after {max_iteration} iterations")
-        iter_count += 1
+def _get_unique_id_str(id_str: str) -> str:
+    unique_str = id_str + f"{next(_ID_COUNTERS[id_str]):04x}"
+    # suffixed strings of different prefixes may still collide, e.g. 'a1' + '0000' & 'a' + '10000'
+    while unique_str in _CACHED_ID_STRS:
+        unique_str = id_str + f"{next(_ID_COUNTERS[id_str]):04x}"
+    _CACHED_ID_STRS.add(unique_str)
 
-        unique_str = id_str + f"{np.random.randint(65536):04x}"
-        if unique_str in _CACHED_ID_STRS:
-            continue
-        _CACHED_ID_STRS.add(unique_str)
-
-        return unique_str
+    return unique_str
 
 
 def get_cached_assets_root_path() -> str:
@@ -69,17 +71,47 @@ def get_cached_assets_root_path() -> str:
     raise RuntimeError("Could not find Isaac Sim assets folder")
 
 
+@lru_cache(maxsize=1)
+def get_cached_stage_units() -> float:
+    """Get stage units of the current stage and cache.
+
+    Cache should be reset with `get_cached_stage_units.cache_clear()` whenever the stage
+    may have changed, e.g. before each scenario.
+    Returns:
+        float: Stage units in meters
+    """
+    return get_stage_units()
+
+
+def sample_obj_positions(num: int) -> np.ndarray:
+    """Sample random object positions within the default bounds in a single draw.
+
+    Returns:
+        np.ndarray: array of shape (num, 3), positions in meters
+    """
+    return _RNG.uniform(
+        _OBJ_POSITION_LOWER_BOUNDS_ARR, _OBJ_POSITION_UPPER_BOUNDS_ARR, size=(num, 3)
+    )
+
+
 def create_rigid_prim_in_scene(
     scene: IsaacScene,
     ns_manager: NamespaceManager,
     model: Union[ObjectModel, AgentModel],
     prim_prefix: str,
+    position: Optional[np.ndarray] = None,
 ) -> RigidPrim:
+    """Create a prim for an object or agent model and add it to the scene.
+
+    If the model configs don't specify a position, `position` (in meters) is used,
+    e.g. pre-sampled with `sample_obj_positions()`, otherwise a random position is sampled.
+    """
     id_str = model.id.n3(namespace_manager=ns_manager)
     id_str = get_valid_var_name(id_str)
 
     # TODO(minhnh): handle initial poses
 
+    units = get_cached_stage_units()
     prim_configs = {}
     model_configs = model.get_attr(key=URI_SIM_PRED_HAS_CONFIG)
     assert model_configs is not None and isinstance(
@@ -88,13 +120,14 @@ def create_rigid_prim_in_scene(
     prim_configs |= model_configs
 
     if "scale" in prim_configs:
-        prim_configs["scale"] = check_or_convert_ndarray(prim_configs["scale"]) / get_stage_units()
+        prim_configs["scale"] = check_or_convert_ndarray(prim_configs["scale"]) / units
     if "color" in prim_configs:
-        prim_configs["color"] = check_or_convert_ndarray(prim_configs["color"]) / get_stage_units()
+        prim_configs["color"] = check_or_convert_ndarray(prim_configs["color"]) / units
 
     if "position" not in prim_configs:
-        obj_position = np.random.uniform(OBJ_POSITION_LOWER_BOUNDS, OBJ_POSITION_UPPER_BOUNDS)
-        prim_configs["position"] = obj_position / get_stage_units()
+        if position is None:
+            position = _RNG.uniform(_OBJ_POSITION_LOWER_BOUNDS_ARR, _OBJ_POSITION_UPPER_BOUNDS_ARR)
+        prim_configs["position"] = position / units
 
     unique_id_str = _get_unique_id_str(id_str=id_str)
     prim_path = find_unique_string_name(
@@ -106,49 +139,54 @@ def create_rigid_prim_in_scene(
         is_unique_fn=lambda x: not scene.object_exists(x),
     )
 
-    if URI_TYPE_USD_FILE in model.model_types:
+    # resolve model attributes once for the type checks below
+    model_types = model.model_types
+    model_type_to_id = model.model_type_to_id
+    sub_models = model.models
+
+    if URI_TYPE_USD_FILE in model_types:
         assert (
-            URI_SIM_TYPE_RES_PATH in model.model_types
+            URI_SIM_TYPE_RES_PATH in model_types
         ), f"object '{model.id}' has type '{URI_TYPE_USD_FILE}' but not type '{URI_SIM_TYPE_RES_PATH}'"
 
         asset_path = None
-        for path_model_id in model.model_type_to_id[URI_SIM_TYPE_RES_PATH]:
-            asset_path = model.models[path_model_id].get_attr(key=URI_SIM_PRED_PATH)
+        for path_model_id in model_type_to_id[URI_SIM_TYPE_RES_PATH]:
+            asset_path = sub_models[path_model_id].get_attr(key=URI_SIM_PRED_PATH)
             if asset_path is not None:
                 break
         assert (
             asset_path is not None
         ), f"attr '{URI_SIM_PRED_PATH}' not loaded for object model '{model.id}'"
 
-        usd_model_uris = model.model_type_to_id[URI_TYPE_USD_FILE]
+        usd_model_uris = model_type_to_id[URI_TYPE_USD_FILE]
 
-        if URI_SIM_TYPE_ISAAC_RES in model.model_types:
+        if URI_SIM_TYPE_ISAAC_RES in model_types:
             asset_path = get_cached_assets_root_path() + asset_path
 
-        elif URI_SIM_TYPE_SYS_RES in model.model_types:
+        elif URI_SIM_TYPE_SYS_RES in model_types:
             assert os_exists(
                 asset_path
             ), f"Path in USD model(s) '{usd_model_uris}' does not exists: {asset_path}"
 
         else:
             raise RuntimeError(
-                f"unhandled types for USD model(s) '{usd_model_uris}': {model.model_types}"
+                f"unhandled types for USD model(s) '{usd_model_uris}': {model_types}"
             )
 
         add_reference_to_stage(usd_path=asset_path, prim_path=prim_path)
         return scene.add(RigidPrim(prim_path=prim_path, name=obj_name, **prim_configs))
 
-    if URI_PY_TYPE_MODULE_ATTR in model.model_types:
+    if URI_PY_TYPE_MODULE_ATTR in model_types:
         correct_cls = None
-        for model_id in model.model_type_to_id[URI_PY_TYPE_MODULE_ATTR]:
-            python_cls = import_attr_from_model(model=model.models[model_id])
+        for model_id in model_type_to_id[URI_PY_TYPE_MODULE_ATTR]:
+            python_cls = import_attr_from_model(model=sub_models[model_id])
             if issubclass(python_cls, RigidPrim) or issubclass(python_cls, Articulation):
                 correct_cls = python_cls
                 break
         assert (
             correct_cls is not None
-        ), f"'{model.id}' has no handled Python class model: {model.models.keys()}"
+        ), f"'{model.id}' has no handled Python class model: {sub_models.keys()}"
 
         return scene.add(correct_cls(name=obj_name, prim_path=prim_path, **prim_configs))
 
-    raise RuntimeError(f"unhandled types for object'{model.id}': {model.model_types}")
+    raise RuntimeError(f"unhandled types for object'{model.id}': {model_types}")